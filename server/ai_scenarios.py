@@ -0,0 +1,130 @@
+"""
+Drive the AI round path against FakeLLMClient and report latency percentiles + breaker transitions.
+
+    python -m server.ai_scenarios                       # run every built-in scenario
+    python -m server.ai_scenarios slow flaky --rounds 50
+    python -m server.ai_scenarios --latency exp:800 --faults server=0.2,malformed=0.1
+    python -m server.ai_scenarios slow --hedge-after 1500
+    python -m server.ai_scenarios duplicates --mode ai_anchored
+    python -m server.ai_scenarios slow --mode default --slo-ms 1500 --rounds 60
+"""
+import argparse
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional
+from . import story
+from .llm import FakeLLMClient, FaultRates
+
+SCENARIOS: Dict[str, Dict[str, str]] = {
+    "healthy":      {"latency": "lognormal:6.0:0.3", "faults": ""},
+    "slow":         {"latency": "lognormal:7.8:0.5", "faults": ""},
+    "flaky":        {"latency": "lognormal:6.2:0.4", "faults": "server=0.25"},
+    "rate_limited": {"latency": "fixed:150",         "faults": "rate_limit=0.3"},
+    "quota":        {"latency": "fixed:150",         "faults": "auth=1"},
+    "bad_json":     {"latency": "fixed:150",         "faults": "malformed=0.3,backticked=0.5"},
+    "duplicates":   {"latency": "fixed:150",         "faults": "duplicate=0.6"},
+}
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(int(round(p / 100 * (len(sorted_vals) - 1))), len(sorted_vals) - 1)
+    return sorted_vals[idx]
+
+def _reset_story_state():
+    story._AI_DISABLED_UNTIL = 0.0
+    story._AI_CONSEC_FAILS = 0
+    story._HEDGE_DISABLED_UNTIL = 0.0
+    story._recent_cities.clear()
+    story._recent_regions.clear()
+    story.breaker_events.clear()
+    story._router = story._LatencyRouter()
+
+def run_scenario(name: str, latency: str, faults: str, rounds: int,
+                 cooldown: Optional[int] = None, seed: Optional[int] = None,
+                 hedge_after_ms: Optional[int] = None, mode: str = "ai",
+                 slo_ms: Optional[float] = None) -> Dict[str, Any]:
+    if slo_ms is not None:
+        story.AI_SLO_P95_MS = slo_ms
+    if hedge_after_ms is not None:
+        story.AI_HEDGE_AFTER_MS = hedge_after_ms
+    if cooldown is not None:
+        story.CB_COOLDOWN_SECS = story.CB_RATELIMIT_SECS = story.CB_QUOTA_SECS = cooldown
+    _reset_story_state()
+    client = FakeLLMClient(latency, FaultRates.parse(faults), seed=seed)
+    story.set_llm_client(client)
+
+    latencies: List[float] = []
+    transitions: List[str] = []
+    ai_rounds = 0
+    routes: Counter = Counter()
+    was_open = False
+    if mode == "default":
+        story.AI_CITY_MODE = True
+    try:
+        for i in range(rounds):
+            t0 = time.perf_counter()
+            bundle = story.pick_place(force_mode=None if mode == "default" else mode)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            ai_rounds += bool(bundle.get("ai"))
+            routes[bundle["route"]["decision"]] += 1
+
+            is_open = not story._ai_available()
+            if is_open != was_open:
+                if is_open:
+                    _, secs, reason = story.breaker_events[-1]
+                    transitions.append(f"round {i + 1}: closed → open ({reason}, {secs}s)")
+                else:
+                    transitions.append(f"round {i + 1}: open → closed")
+                was_open = is_open
+    finally:
+        story.set_llm_client(None)
+
+    lat = sorted(latencies)
+    return {
+        "scenario": name,
+        "rounds": rounds,
+        "aiRounds": ai_rounds,
+        "llmCalls": client.calls,
+        "p50": percentile(lat, 50),
+        "p90": percentile(lat, 90),
+        "p99": percentile(lat, 99),
+        "max": lat[-1] if lat else 0.0,
+        "transitions": transitions,
+        "routes": dict(routes),
+        "offloadShare": story._router.offload,
+    }
+
+def _print_report(r: Dict[str, Any]):
+    print(
+        f"\n== {r['scenario']}: {r['aiRounds']}/{r['rounds']} AI rounds, {r['llmCalls']} LLM calls"
+        f"\n   latency ms  p50={r['p50']:.0f}  p90={r['p90']:.0f}  p99={r['p99']:.0f}  max={r['max']:.0f}"
+    )
+    print(f"   routes {r['routes']}  final offload share={r['offloadShare']:.2f}")
+    for t in r["transitions"] or ["(no breaker transitions)"]:
+        print(f"   {t}")
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("scenarios", nargs="*", help=f"built-ins: {', '.join(SCENARIOS)}")
+    ap.add_argument("--rounds", type=int, default=30)
+    ap.add_argument("--latency", help="custom latency spec, e.g. uniform:100:800")
+    ap.add_argument("--faults", default="", help="custom fault rates, e.g. server=0.2,duplicate=0.5")
+    ap.add_argument("--cooldown", type=int, help="override all breaker cooldowns (secs) to observe recovery")
+    ap.add_argument("--seed", type=int)
+    ap.add_argument("--hedge-after", type=int, help="enable hedged requests after this many ms")
+    ap.add_argument("--mode", default="ai", choices=["ai", "ai_anchored", "default"])
+    ap.add_argument("--slo-ms", type=float, help="enable the latency-SLO router with this p95 target")
+    args = ap.parse_args(argv)
+
+    if args.latency:
+        runs = {"custom": {"latency": args.latency, "faults": args.faults}}
+    else:
+        runs = {n: SCENARIOS[n] for n in (args.scenarios or SCENARIOS)}
+
+    for name, cfg in runs.items():
+        _print_report(run_scenario(name, cfg["latency"], cfg["faults"], args.rounds, args.cooldown, args.seed,
+                                    args.hedge_after, args.mode, args.slo_ms))
+
+if __name__ == "__main__":
+    main()
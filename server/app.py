@@ -1,17 +1,29 @@
+import os
+import secrets
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path=Path(__file__).with_name(".env"), override=True, encoding="utf-8")
 
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Response, WebSocket, WebSocketDisconnect, Header, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from typing import Dict, Any, Optional, Literal
 from .store import RoundStore
-from .story import pick_place, evaluate_guess
+from .stats import StatsStore, catalog_id
+from .persist import RoundJournal, STATE_DIR
+from .rooms import RoomManager, Player
+from . import profiling
+from .profiling import ProfilingMiddleware, span
+from .story import pick_place, evaluate_guess, export_state, restore_state
 
 app = FastAPI(title="FindYourCity API", version="0.1.2")
 
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # unset => /api/admin/* disabled
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -25,13 +37,17 @@ app.add_middleware(
     allow_headers=["*"],
     max_age=600,
 )
+app.add_middleware(ProfilingMiddleware)
 
-store = RoundStore(ttl_seconds=20 * 60)  # 20 minutes
+journal = RoundJournal(STATE_DIR) if STATE_DIR else None
+store = RoundStore(ttl_seconds=20 * 60, journal=journal)  # 20 minutes
+place_stats = StatsStore()
+rooms = RoomManager()
 
 # ====== Models ======
 class NewRoundRequest(BaseModel):
     # Toggle coming from the UI. If omitted, server uses its env defaults.
-    mode: Optional[Literal["offline", "ai"]] = None
+    mode: Optional[Literal["offline", "ai", "ai_anchored"]] = None
 
 class NewRoundResponse(BaseModel):
     roundId: str
@@ -41,12 +57,16 @@ class NewRoundResponse(BaseModel):
     mapDefault: Dict[str, Any]
     maxScore: int = 5000
     aiEmbellished: bool = False
+    modeUsed: str = "offline"
+    fallbackReason: Optional[str] = None
+    route: Optional[Dict[str, Any]] = None
 
 class GuessRequest(BaseModel):
     lat: float = Field(..., ge=-90, le=90)
     lon: float = Field(..., ge=-180, le=180)
 
 class Answer(BaseModel):
+    id: Optional[str] = None   # key for /api/places/{id}/stats and /heatmap; None for AI-invented cities
     city: str
     country: str
     region: str
@@ -58,6 +78,54 @@ class GuessResponse(BaseModel):
     score: int
     answer: Answer
 
+class NewRoomResponse(BaseModel):
+    roomId: str
+    hostToken: str
+
+# ====== Lifecycle ======
+@app.on_event("startup")
+def restore_stats():
+    place_stats.load()
+    if not place_stats.acquire():
+        # another worker owns STATS_SNAPSHOT_PATH; two writers would overwrite each other's aggregates
+        print("⚠️ STATS_SNAPSHOT_PATH is in use by another worker → stats snapshots disabled in this one")
+    place_stats.start()
+
+@app.on_event("startup")
+def restore_rounds():
+    global journal
+    if not journal:
+        return
+    if not journal.acquire():
+        # another worker of this deployment owns STATE_DIR; overwriting its snapshots would lose rounds
+        print("⚠️ STATE_DIR is in use by another worker → round persistence disabled in this one")
+        store.journal = journal = None
+        return
+    try:
+        t0 = time.perf_counter()
+        n = store.restore()
+        state = journal.load_story_state()
+        if state:
+            restore_state(state)
+        print(f"♻️ Restored {n} live rounds in {(time.perf_counter() - t0) * 1000:.0f}ms")
+    except (OSError, ValueError) as e:
+        # leave the files as they are: a snapshot now would replace them with this empty store
+        print("⚠️ Failed to restore round state → round persistence disabled for this run:", e)
+        store.journal = journal = None
+        return
+    journal.start(lambda: store.snapshot(export_state()))
+
+@app.on_event("shutdown")
+def persist_stats():
+    place_stats.stop()
+    place_stats.snapshot()
+
+@app.on_event("shutdown")
+def persist_rounds():
+    if journal:
+        journal.stop()
+        store.snapshot(export_state())
+
 # ====== Routes ======
 @app.get("/")
 def root():
@@ -77,29 +145,159 @@ def new_round(body: NewRoundRequest | None = None):
     bundle = pick_place(force_mode=forced_mode)
 
     place = bundle["place"]
-    rid = store.new_round(place["lat"], place["lon"], {"place": place})
-    return NewRoundResponse(
-        roundId=rid,
-        character=bundle["character"],
-        monologue=bundle["monologue"],
-        hints=bundle["hints"],
-        mapDefault=bundle["mapDefault"],
-        aiEmbellished=bundle.get("ai", False),
-    )
+    with span("store.new_round"):
+        rid = store.new_round(place["lat"], place["lon"], {"place": place})
+    with span("app.build_response"):
+        return NewRoundResponse(
+            roundId=rid,
+            character=bundle["character"],
+            monologue=bundle["monologue"],
+            hints=bundle["hints"],
+            mapDefault=bundle["mapDefault"],
+            aiEmbellished=bundle.get("ai", False),
+            modeUsed=bundle.get("modeUsed", "offline"),
+            fallbackReason=bundle.get("fallbackReason"),
+            route=bundle.get("route"),
+        )
 
 @app.post("/api/round/{round_id}/guess", response_model=GuessResponse)
 def submit_guess(round_id: str, body: GuessRequest):
-    answer = store.get_answer(round_id)
+    with span("store.get_answer"):
+        answer = store.get_answer(round_id)
     if not answer:
         raise HTTPException(status_code=404, detail="Round not found or expired.")
     lat, lon, meta = answer
     dist_km, score = evaluate_guess((lat, lon), (body.lat, body.lon))
     place = meta["place"]
+    with span("stats.record"):
+        place_stats.record(place, body.lat, body.lon, dist_km, score)
     return GuessResponse(
         distance_km=round(dist_km, 2),
         score=score,
         answer=Answer(
+            id=catalog_id(place["city"], place["country"]),
             city=place["city"], country=place["country"], region=place["region"],
             lat=place["lat"], lon=place["lon"],
         ),
     )
+
+@app.get("/api/places/{place_id}/stats")
+def place_difficulty(place_id: str):
+    summary = place_stats.summary(place_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="No guesses recorded for this place.")
+    return summary
+
+@app.get("/api/places/{place_id}/heatmap")
+def place_heatmap(place_id: str):
+    heat = place_stats.heatmap(place_id)
+    if not heat:
+        raise HTTPException(status_code=404, detail="No guesses recorded for this place.")
+    return heat
+
+# ====== Admin: profiling & tracing ======
+def _require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+
+@app.post("/api/admin/profile", response_class=PlainTextResponse)
+def admin_profile(
+    seconds: float = Query(10, gt=0),
+    requests: Optional[int] = Query(None, gt=0),
+    interval_ms: float = Query(5, ge=1),
+    idle: bool = False,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Sample all threads for `seconds` (or until `requests` more requests finish). Returns collapsed stacks."""
+    _require_admin(x_admin_token)
+    try:
+        result = profiling.profile(seconds, requests, interval_ms, idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(
+        result["collapsed"],
+        headers={"X-Profile-Samples": str(result["samples"]), "X-Profile-Secs": f"{result['secs']:.2f}"},
+    )
+
+@app.post("/api/admin/tracing")
+def admin_tracing(enabled: bool, x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    profiling.set_tracing(enabled)
+    return {"tracing": profiling.state.tracing}
+
+@app.get("/api/admin/traces")
+def admin_traces(limit: int = Query(50, ge=1, le=profiling.TRACE_KEEP), x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    return {"tracing": profiling.state.tracing, "traces": list(profiling.recent_traces)[-limit:]}
+
+# ====== Multiplayer rooms ======
+@app.post("/api/rooms", response_model=NewRoomResponse)
+async def create_room():
+    room = rooms.create()
+    return NewRoomResponse(roomId=room.id, hostToken=room.host_token)
+
+ROOM_MODES = ("offline", "ai", "ai_anchored", None)  # tuple: membership must not hash arbitrary JSON
+
+@app.websocket("/ws/rooms/{room_id}")
+async def room_socket(ws: WebSocket, room_id: str, name: str = "Player", token: Optional[str] = None):
+    room = rooms.get(room_id)
+    if not room:
+        await ws.close(code=4404)
+        return
+    await ws.accept()
+    player = Player(ws, name[:24] or "Player", is_host=(token == room.host_token))
+    room.players[player.id] = player
+    player.start()
+    room.send(player, {"type": "welcome", "playerId": player.id, "host": player.is_host, "round": room.round_no})
+    if room.round_text and not room.revealed:
+        player.push(room.round_text)
+    room.schedule_scoreboard()
+    try:
+        while True:
+            msg = await ws.receive_json()
+            if not isinstance(msg, dict):
+                room.send(player, {"type": "error", "detail": "Messages must be JSON objects."})
+                continue
+            kind = msg.get("type")
+            if kind == "start":
+                if not player.is_host or room.starting:
+                    continue
+                mode = msg.get("mode")
+                if mode not in ROOM_MODES:
+                    room.send(player, {"type": "error", "detail": "Invalid mode."})
+                    continue
+                room.starting = True
+                try:
+                    bundle = await run_in_threadpool(pick_place, mode)
+                finally:
+                    room.starting = False
+                room.start_round(bundle)
+                room.schedule_scoreboard()
+            elif kind == "guess":
+                try:
+                    guess = GuessRequest.model_validate(msg)
+                except ValidationError:
+                    room.send(player, {"type": "error", "detail": "Invalid guess."})
+                    continue
+                place = room.place
+                if place is None:
+                    continue
+                dist_km, score = evaluate_guess((place["lat"], place["lon"]), (guess.lat, guess.lon))
+                if not room.record_guess(player, dist_km, score):
+                    continue
+                room.send(player, {"type": "result", "round": room.round_no, **room.guesses[player.id]})
+                room.schedule_scoreboard()
+                if room.all_guessed():
+                    room.reveal()
+                # last, and off the event loop: record() takes the stats lock shared with request threads
+                await run_in_threadpool(place_stats.record, place, guess.lat, guess.lon, dist_km, score)
+    except (WebSocketDisconnect, ValueError, RuntimeError):
+        pass
+    finally:
+        rooms.leave(room, player)
+        if room.players:
+            room.schedule_scoreboard()
+            if room.place is not None and not room.revealed and room.all_guessed():
+                room.reveal()
@@ -0,0 +1,30 @@
+"""
+Copy-on-write friendly multi-worker entry point:
+
+    gunicorn -c server/gunicorn_conf.py
+
+The app is imported once in the master (preload), warmed up and frozen out of the GC, then forked.
+PRELOAD_APP=0 falls back to importing the app separately in every worker (for comparison).
+"""
+import gc
+import os
+
+preload_app = os.getenv("PRELOAD_APP", "1") != "0"
+if preload_app:
+    # Keep the collector from touching (and thus un-sharing) objects while the master builds them.
+    gc.disable()
+
+wsgi_app = "server.app:app"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+def when_ready(server):
+    if preload_app:
+        from server.preload import warm
+        warm()
+
+def post_fork(server, worker):
+    if preload_app:
+        from server.preload import after_fork
+        after_fork()
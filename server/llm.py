@@ -0,0 +1,121 @@
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional, Protocol
+from .game_data import PLACES
+
+# =========================
+# Client interface
+# =========================
+class LLMClient(Protocol):
+    """Minimal chat-completion surface used by story.py. Returns the raw message text."""
+
+    def complete(self, prompt: str, *, model: str, temperature: float,
+                 max_tokens: int, presence_penalty: float = 0.0) -> str: ...
+
+class OpenAIChatClient:
+    def __init__(self, api_key: str, base_url: Optional[str] = None, timeout: float = 30.0, max_retries: int = 1):
+        from openai import OpenAI
+        # finite timeout: a dropped hedge loser still holds its thread until the call returns
+        self._client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=max_retries)
+
+    def complete(self, prompt: str, *, model: str, temperature: float,
+                 max_tokens: int, presence_penalty: float = 0.0) -> str:
+        resp = self._client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            presence_penalty=presence_penalty,
+        )
+        return (resp.choices[0].message.content or "").strip()
+
+# =========================
+# In-process fake (perf testing / fault injection)
+# =========================
+class FakeLLMError(Exception):
+    """Raised by FakeLLMClient; messages mimic the OpenAI SDK so story.py classifies them the same way."""
+
+def parse_latency(spec: str, rng: Optional[random.Random] = None):
+    """
+    Latency distribution in milliseconds:
+      "fixed:200" | "uniform:100:800" | "exp:400" (mean) | "lognormal:6.0:0.5" (mu, sigma of ln ms)
+    """
+    rng = rng or random.Random()
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda: vals[0]
+    if kind == "uniform":
+        return lambda: rng.uniform(vals[0], vals[1])
+    if kind == "exp":
+        return lambda: rng.expovariate(1.0 / vals[0])
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(vals[0], vals[1])
+    raise ValueError(f"unknown latency spec: {spec!r}")
+
+@dataclass
+class FaultRates:
+    rate_limit: float = 0.0   # 429
+    auth: float = 0.0         # 401 invalid_api_key
+    server: float = 0.0       # 5xx
+    malformed: float = 0.0    # truncated / non-JSON body
+    backticked: float = 0.0   # valid JSON wrapped in ```json fences
+    duplicate: float = 0.0    # repeat the previously returned city
+
+    @classmethod
+    def parse(cls, spec: str) -> "FaultRates":
+        """Parse e.g. "rate_limit=0.1,server=0.05,backticked=0.5" (unlisted faults stay at 0)."""
+        rates = cls()
+        for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+            name, _, val = part.partition("=")
+            if not hasattr(rates, name):
+                raise ValueError(f"unknown fault: {name!r}")
+            setattr(rates, name, float(val))
+        return rates
+
+class FakeLLMClient:
+    """Returns AIPlace-shaped JSON built from PLACES after a sampled delay, injecting faults at the given rates."""
+
+    def __init__(self, latency: str = "fixed:0", faults: Optional[FaultRates] = None, seed: Optional[int] = None):
+        self._rng = random.Random(seed)
+        self._latency = parse_latency(latency, self._rng)
+        self.faults = faults or FaultRates()
+        self._last: Optional[dict] = None
+        self.calls = 0
+
+    def complete(self, prompt: str, *, model: str, temperature: float,
+                 max_tokens: int, presence_penalty: float = 0.0) -> str:
+        self.calls += 1
+        time.sleep(max(self._latency(), 0.0) / 1000.0)
+
+        f, roll = self.faults, self._rng.random
+        if roll() < f.rate_limit:
+            raise FakeLLMError("Error code: 429 - Rate limit reached for requests")
+        if roll() < f.auth:
+            raise FakeLLMError("Error code: 401 - invalid_api_key")
+        if roll() < f.server:
+            raise FakeLLMError("Error code: 503 - The server is overloaded")
+
+        anchored = re.search(r"Secret city: ([^,]+),", prompt)
+        if self._last is not None and roll() < f.duplicate:
+            data = self._last
+        else:
+            matches = [p for p in PLACES if anchored and p.city == anchored.group(1)]
+            p = matches[0] if matches else self._rng.choice(PLACES)
+            data = {
+                "city": p.city, "country": p.country, "lat": p.lat, "lon": p.lon, "region": p.region,
+                "character": "Test Persona",
+                "monologue": f"I love {p.tidbits[0]}. Most days end with {p.cuisine[0]}.",
+                "hints": {"cuisine": p.cuisine[:2], "habits": p.habits[:2], "vibes": p.tidbits[:1]},
+            }
+        self._last = data
+        raw = json.dumps(data, ensure_ascii=False)
+
+        if roll() < f.malformed:
+            return raw[: len(raw) // 2]
+        if roll() < f.backticked:
+            return f"```json\n{raw}\n```"
+        return raw
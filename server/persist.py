@@ -0,0 +1,240 @@
+import json
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Tuple, Optional, Callable
+
+STATE_DIR = os.getenv("STATE_DIR", str(Path(__file__).with_name("state")))   # "" disables round/story persistence
+STATE_SNAPSHOT_SECS = int(os.getenv("STATE_SNAPSHOT_SECS", "30"))
+
+# Snapshot layout (little-endian):
+#   b"FYC1" | u32 round_count | u32 meta_blob_len | meta_blob (JSON list of distinct metas) | records
+#   record = 16s rid | f64 lat | f64 lon | f64 expires_at | u32 meta_index
+# Delta log: repeated  u8 op ("N" new / "D" delete) | 16s rid | [f64 lat | f64 lon | f64 exp | u32 len | meta JSON]
+_MAGIC = b"FYC1"
+_HEADER = struct.Struct("<4sII")
+_RECORD = struct.Struct("<16sdddI")
+_DELTA_NEW = struct.Struct("<c16sdddI")
+_DELTA_DEL = struct.Struct("<c16s")
+
+Item = Tuple[float, float, float, dict]
+
+_held_locks: list = []  # open lock files; closing one releases it
+
+def claim_writer_lock(path: Path) -> bool:
+    """
+    Non-blocking exclusive flock on `path`, held for the life of the process. Workers of one deployment
+    (gunicorn or `uvicorn --workers N`) share the disk but not memory: only the first may own the files.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows: no forking multi-worker servers to guard against
+        return True
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return False
+    _held_locks.append(f)
+    return True
+
+class RoundJournal:
+    """
+    Durable copy of RoundStore._items: a compact binary snapshot every STATE_SNAPSHOT_SECS plus an
+    append-only delta log of rounds created/removed since. Story state (recent cities, breaker) rides
+    along as a small JSON sidecar written with each snapshot.
+    """
+
+    def __init__(self, state_dir: str = STATE_DIR, snapshot_secs: int = STATE_SNAPSHOT_SECS):
+        self.dir = Path(state_dir)
+        self.snapshot_secs = snapshot_secs
+        self.snapshot_path = self.dir / "rounds.snap"
+        self.delta_path = self.dir / "rounds.delta"
+        self.old_delta_path = self.dir / "rounds.delta.old"
+        self.story_path = self.dir / "story.json"
+        self._lock = threading.Lock()
+        self._snap_lock = threading.Lock()
+        self._meta_keys: Dict[int, Tuple[dict, str]] = {}  # id(meta) -> (meta, JSON key), reused across snapshots
+        self._log = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- delta log ----
+    def _open_log(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._log = open(self.delta_path, "ab")
+
+    def acquire(self) -> bool:
+        """True if this process may own STATE_DIR (see claim_writer_lock)."""
+        return claim_writer_lock(self.dir / ".lock")
+
+    @staticmethod
+    def encode_new(rid: str, item: Item) -> bytes:
+        lat, lon, exp, meta = item
+        blob = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return _DELTA_NEW.pack(b"N", bytes.fromhex(rid), lat, lon, exp, len(blob)) + blob
+
+    @staticmethod
+    def encode_delete(rid: str) -> bytes:
+        return _DELTA_DEL.pack(b"D", bytes.fromhex(rid))
+
+    def append(self, rec: bytes):
+        try:
+            with self._lock:
+                if self._log is None:
+                    self._open_log()
+                self._log.write(rec)
+                self._log.flush()
+        except OSError as e:
+            print("⚠️ Failed to append to round delta log:", e)
+
+    # ---- snapshot ----
+    def snapshot(self, items: Dict[str, Item], lock: threading.Lock, story_state: Optional[dict] = None):
+        """Capture items and rotate the delta log atomically, then write the snapshot off the lock."""
+        with self._snap_lock:
+            return self._snapshot(items, lock, story_state)
+
+    def _snapshot(self, items: Dict[str, Item], lock: threading.Lock, story_state: Optional[dict]):
+        with lock, self._lock:
+            captured = list(items.items())
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            if self.delta_path.exists():
+                if self.old_delta_path.exists():  # a previous snapshot didn't finish; keep its delta too
+                    with open(self.old_delta_path, "ab") as old:
+                        old.write(self.delta_path.read_bytes())
+                    self.delta_path.unlink()
+                else:
+                    os.replace(self.delta_path, self.old_delta_path)
+
+        # Metas are deduplicated by content. Encoding each one is the expensive part, so keys are cached
+        # per meta object and carried to the next snapshot: steady state only encodes rounds created since.
+        now = time.time()
+        prev_keys, seen_keys = self._meta_keys, {}
+        interned: Dict[str, str] = {}
+        blob_index: Dict[str, int] = {}
+        metas: list = []
+        records = bytearray()
+        count = 0
+        for rid, (lat, lon, exp, meta) in captured:
+            if exp <= now:
+                continue
+            mid = id(meta)
+            cached = seen_keys.get(mid) or prev_keys.get(mid)
+            if cached is None or cached[0] is not meta:
+                key = json.dumps(meta, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+                cached = (meta, interned.setdefault(key, key))
+            seen_keys[mid] = cached
+            idx = blob_index.get(cached[1])
+            if idx is None:
+                idx = blob_index[cached[1]] = len(metas)
+                metas.append(meta)
+            records += _RECORD.pack(bytes.fromhex(rid), lat, lon, exp, idx)
+            count += 1
+        self._meta_keys = seen_keys
+
+        meta_blob = json.dumps(metas, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, count, len(meta_blob)))
+            f.write(meta_blob)
+            f.write(records)
+        os.replace(tmp, self.snapshot_path)
+        self.old_delta_path.unlink(missing_ok=True)
+
+        if story_state is not None:
+            tmp = self.story_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(story_state, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.story_path)
+        return count
+
+    # ---- restore ----
+    def restore(self) -> Dict[str, Item]:
+        """
+        Snapshot + any delta logs (old first), skipping expired rounds. A corrupt snapshot is moved
+        aside (rounds.snap.bad) and the deltas are replayed alone, so the next snapshot can't
+        overwrite it or drop deltas that were never applied.
+        """
+        now = time.time()
+        items: Dict[str, Item] = {}
+        if self.snapshot_path.exists():
+            try:
+                items = self._load_snapshot(now)
+            except ValueError as e:
+                bad = self.snapshot_path.with_suffix(".snap.bad")
+                os.replace(self.snapshot_path, bad)
+                print(f"⚠️ Corrupt round snapshot moved to {bad.name} ({e}); replaying delta logs only")
+        for path in (self.old_delta_path, self.delta_path):
+            if path.exists():
+                self._replay(path.read_bytes(), items, now)
+        return items
+
+    def _load_snapshot(self, now: float) -> Dict[str, Item]:
+        buf = memoryview(self.snapshot_path.read_bytes())
+        try:
+            magic, count, meta_len = _HEADER.unpack_from(buf)
+            if magic != _MAGIC:
+                raise ValueError("bad header")
+            off = _HEADER.size
+            metas = json.loads(bytes(buf[off:off + meta_len]))
+            off += meta_len
+            return {
+                rid.hex(): (lat, lon, exp, metas[idx])
+                for rid, lat, lon, exp, idx in _RECORD.iter_unpack(buf[off:off + count * _RECORD.size])
+                if exp > now
+            }
+        except (struct.error, IndexError) as e:  # truncated file / records / meta table
+            raise ValueError(f"truncated snapshot: {e}") from e
+
+    @staticmethod
+    def _replay(buf: bytes, items: Dict[str, Item], now: float):
+        off, n = 0, len(buf)
+        while off < n:
+            op = buf[off:off + 1]
+            if op == b"N" and off + _DELTA_NEW.size <= n:
+                _, rid, lat, lon, exp, blen = _DELTA_NEW.unpack_from(buf, off)
+                off += _DELTA_NEW.size
+                if off + blen > n:
+                    break  # torn tail write
+                if exp > now:
+                    try:
+                        items[rid.hex()] = (lat, lon, exp, json.loads(buf[off:off + blen]))
+                    except ValueError:
+                        break  # corrupt record: keep what was replayed so far
+                off += blen
+            elif op == b"D" and off + _DELTA_DEL.size <= n:
+                _, rid = _DELTA_DEL.unpack_from(buf, off)
+                items.pop(rid.hex(), None)
+                off += _DELTA_DEL.size
+            else:
+                break
+
+    def load_story_state(self) -> Optional[dict]:
+        if not self.story_path.exists():
+            return None
+        try:
+            return json.loads(self.story_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print("⚠️ Failed to load story state:", e)
+            return None
+
+    # ---- background snapshots ----
+    def start(self, snapshot_fn: Callable[[], None]):
+        def loop():
+            while not self._stop.wait(self.snapshot_secs):
+                try:
+                    snapshot_fn()
+                except Exception as e:
+                    print("⚠️ Round snapshot failed:", e)
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="round-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,19 @@
+import gc
+from . import app as app_module
+from . import story
+
+def warm():
+    """Build lazily-created immutable data in the master so forked workers share those pages."""
+    app_module.app.openapi()                                  # route + pydantic schemas
+    story._redact_leaks("warm-up", "", "")                    # compiles the redaction regexes into re's cache
+    story._pick_from_local()
+    gc.collect()
+    gc.freeze()                                               # move survivors to the permanent generation
+
+def after_fork():
+    """Per-process resources must not be inherited from the master: threads and sockets don't survive fork."""
+    gc.enable()
+    if not story._llm_client_injected:
+        story._llm_client = None                              # HTTP client is created lazily per worker
+    story._hedge_client = None
+    story._hedge_pool = None
@@ -0,0 +1,183 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Any, List, Optional, Tuple
+
+PROFILE_MAX_SECS = int(os.getenv("PROFILE_MAX_SECS", "60"))
+TRACE_KEEP = int(os.getenv("TRACE_KEEP", "200"))   # recent request traces kept for /api/admin/traces
+
+# =========================
+# Runtime switches (read on the hot path; plain attribute checks when everything is off)
+# =========================
+class _State:
+    tracing = False
+    sampler: Optional["Sampler"] = None
+
+state = _State()
+_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("fyc_trace", default=None)
+recent_traces = deque(maxlen=TRACE_KEEP)
+
+def set_tracing(enabled: bool):
+    state.tracing = enabled
+
+def traced(name: str):
+    """Record a span for the wrapped call into the current request trace, only while tracing is on."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not state.tracing:
+                return fn(*args, **kwargs)
+            spans = _trace.get()
+            if spans is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                spans.append((name, (time.perf_counter() - t0) * 1000))
+        return wrapper
+    return deco
+
+class _Span:
+    __slots__ = ("name", "spans", "t0")
+
+    def __init__(self, name: str, spans: List[Tuple[str, float]]):
+        self.name, self.spans = name, spans
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.spans.append((self.name, (time.perf_counter() - self.t0) * 1000))
+
+_NOOP = nullcontext()
+
+def span(name: str):
+    """`with span("x"):` — a shared no-op context manager unless tracing is on for this request."""
+    if not state.tracing:
+        return _NOOP
+    spans = _trace.get()
+    return _Span(name, spans) if spans is not None else _NOOP
+
+# =========================
+# Statistical sampler
+# =========================
+# leaf frames that just mean "parked thread" (pool workers, event loop waiting on I/O)
+_IDLE_LEAVES = {"wait", "select", "poll", "get", "_worker", "accept", "run_forever", "_run_once"}
+_IDLE_FILES = {"threading.py", "queue.py", "selectors.py", "base_events.py", "thread.py", "socket.py"}
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return code.co_name in _IDLE_LEAVES and os.path.basename(code.co_filename) in _IDLE_FILES
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    mod = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{mod}:{getattr(code, 'co_qualname', code.co_name)}"
+
+class Sampler:
+    """Walks every thread's stack each interval via sys._current_frames(); output is collapsed-stack text."""
+
+    def __init__(self, interval_ms: float = 5.0, include_idle: bool = False):
+        self.interval = max(interval_ms, 1.0) / 1000
+        self.include_idle = include_idle
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.requests_left: Optional[int] = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fyc-sampler", daemon=True)
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._done.is_set():
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if not self.include_idle and _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+            self._done.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def note_request(self):
+        if self.requests_left is not None:
+            self.requests_left -= 1
+            if self.requests_left <= 0:
+                self._done.set()
+
+    def run_for(self, seconds: float, requests: Optional[int] = None) -> str:
+        """Blocks until `seconds` elapse or `requests` requests complete (whichever is first)."""
+        self.requests_left = requests
+        self.start()
+        self._done.wait(seconds)
+        self._done.set()
+        self._thread.join()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {n}" for stack, n in self.counts.most_common())
+
+# =========================
+# ASGI middleware: request spans + request counting for the sampler
+# =========================
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (state.tracing or state.sampler):
+            return await self.app(scope, receive, send)
+
+        spans: List[Tuple[str, float]] = []
+        token = _trace.set(spans)
+        t0 = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and state.tracing:
+                total = (time.perf_counter() - t0) * 1000
+                timing = ", ".join(f"{n};dur={d:.2f}" for n, d in spans + [("total", total)])
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _trace.reset(token)
+            if state.tracing:
+                recent_traces.append({
+                    "path": scope.get("path"),
+                    "method": scope.get("method"),
+                    "ts": time.time(),
+                    "totalMs": round((time.perf_counter() - t0) * 1000, 3),
+                    "spans": [{"name": n, "ms": round(d, 3)} for n, d in spans],
+                })
+            sampler = state.sampler
+            if sampler is not None:
+                sampler.note_request()
+
+_profile_lock = threading.Lock()
+
+def profile(seconds: float, requests: Optional[int], interval_ms: float, include_idle: bool) -> Dict[str, Any]:
+    sampler = Sampler(interval_ms, include_idle)
+    with _profile_lock:
+        if state.sampler is not None:
+            raise RuntimeError("a profile is already running")
+        state.sampler = sampler
+    try:
+        t0 = time.perf_counter()
+        out = sampler.run_for(min(seconds, PROFILE_MAX_SECS), requests)
+        return {"collapsed": out, "samples": sampler.samples, "secs": time.perf_counter() - t0}
+    finally:
+        state.sampler = None
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import secrets
+import time
+import uuid
+from typing import Dict, Any, Optional
+from fastapi import WebSocket
+from .stats import catalog_id
+
+ROOM_SEND_QUEUE = int(os.getenv("ROOM_SEND_QUEUE", "32"))      # pending messages per socket before it's dropped
+ROOM_IDLE_SECS = int(os.getenv("ROOM_IDLE_SECS", "600"))       # unjoined rooms are pruned after this
+ROOM_SCOREBOARD_MS = int(os.getenv("ROOM_SCOREBOARD_MS", "250"))  # scoreboard updates are coalesced to one per window
+ROOM_SCOREBOARD_TOP = int(os.getenv("ROOM_SCOREBOARD_TOP", "50"))  # rows per scoreboard; keeps payload size flat in big rooms
+
+class Player:
+    """One socket. Broadcasts only enqueue pre-serialized text; a per-socket writer task drains it."""
+
+    def __init__(self, ws: WebSocket, name: str, is_host: bool):
+        self.id = uuid.uuid4().hex[:8]
+        self.ws = ws
+        self.name = name
+        self.is_host = is_host
+        self.total = 0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=ROOM_SEND_QUEUE)
+        self.writer: Optional[asyncio.Task] = None
+
+    async def _drain(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await self.ws.send_text(text)
+        except Exception:
+            pass  # socket closed; the reader side handles cleanup
+
+    def start(self):
+        self.writer = asyncio.create_task(self._drain())
+
+    def push(self, text: str) -> bool:
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+class Room:
+    def __init__(self):
+        self.id = secrets.token_urlsafe(6)
+        self.host_token = secrets.token_urlsafe(16)
+        self.created = time.time()
+        self.players: Dict[str, Player] = {}
+        self.round_no = 0
+        self.place: Optional[dict] = None
+        self.guesses: Dict[str, Dict[str, Any]] = {}  # player id -> {distance_km, score}
+        self.starting = False
+        self.revealed = False                   # answer shown for the current round; no more guesses
+        self.round_text: Optional[str] = None   # serialized clue payload, replayed to late joiners
+        self._scoreboard_timer: Optional[asyncio.TimerHandle] = None
+
+    def broadcast(self, payload: Dict[str, Any]) -> str:
+        """Serialize once for the whole room, then fan out; clients that can't keep up are disconnected."""
+        text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        for pid, p in list(self.players.items()):
+            if not p.push(text):
+                print(f"🐢 Dropping slow client {p.name} from room {self.id}")
+                self.players.pop(pid, None)
+                asyncio.create_task(p.ws.close(code=1013))
+        return text
+
+    def send(self, player: Player, payload: Dict[str, Any]):
+        player.push(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+
+    def scoreboard(self) -> Dict[str, Any]:
+        rows = [
+            {"id": p.id, "name": p.name, "host": p.is_host, "total": p.total,
+             "lastScore": self.guesses.get(p.id, {}).get("score"), "guessed": p.id in self.guesses}
+            for p in self.players.values()
+        ]
+        rows.sort(key=lambda r: -r["total"])
+        return {
+            "type": "scoreboard", "round": self.round_no,
+            "playerCount": len(rows), "guessedCount": len(self.guesses),
+            "players": rows[:ROOM_SCOREBOARD_TOP],
+        }
+
+    def schedule_scoreboard(self):
+        """Joins and guesses arrive in bursts; one scoreboard per window keeps fan-out linear in room size."""
+        if self._scoreboard_timer is None:
+            self._scoreboard_timer = asyncio.get_running_loop().call_later(
+                ROOM_SCOREBOARD_MS / 1000, self.flush_scoreboard)
+
+    def flush_scoreboard(self):
+        if self._scoreboard_timer is not None:
+            self._scoreboard_timer.cancel()
+            self._scoreboard_timer = None
+        if self.players:
+            self.broadcast(self.scoreboard())
+
+    def start_round(self, bundle: Dict[str, Any]):
+        self.round_no += 1
+        self.place = bundle["place"]
+        self.guesses = {}
+        self.revealed = False
+        self.round_text = self.broadcast({
+            "type": "round",
+            "round": self.round_no,
+            "character": bundle["character"],
+            "monologue": bundle["monologue"],
+            "hints": bundle["hints"],
+            "mapDefault": bundle["mapDefault"],
+            "maxScore": 5000,
+            "aiEmbellished": bundle.get("ai", False),
+        })
+
+    def record_guess(self, player: Player, distance_km: float, score: int) -> bool:
+        if self.place is None or self.revealed or player.id in self.guesses:
+            return False
+        self.guesses[player.id] = {"distance_km": round(distance_km, 2), "score": score}
+        player.total += score
+        return True
+
+    def all_guessed(self) -> bool:
+        return bool(self.players) and all(pid in self.guesses for pid in self.players)
+
+    def reveal(self):
+        if self.revealed:
+            return
+        self.revealed = True
+        place = self.place
+        self.flush_scoreboard()
+        self.broadcast({
+            "type": "reveal",
+            "round": self.round_no,
+            "answer": {"id": catalog_id(place["city"], place["country"]),
+                       **{k: place[k] for k in ("city", "country", "region", "lat", "lon")}},
+        })
+
+class RoomManager:
+    def __init__(self):
+        self._rooms: Dict[str, Room] = {}
+
+    def create(self) -> Room:
+        now = time.time()
+        for rid, r in list(self._rooms.items()):
+            if not r.players and now - r.created > ROOM_IDLE_SECS:
+                self._rooms.pop(rid, None)
+        room = Room()
+        self._rooms[room.id] = room
+        return room
+
+    def get(self, room_id: str) -> Optional[Room]:
+        return self._rooms.get(room_id)
+
+    def leave(self, room: Room, player: Player):
+        room.players.pop(player.id, None)
+        if player.writer:
+            player.writer.cancel()
+        if not room.players:
+            room.flush_scoreboard()
+            self._rooms.pop(room.id, None)
+        elif player.is_host and not any(p.is_host for p in room.players.values()):
+            next(iter(room.players.values())).is_host = True  # hand the start button to someone still here
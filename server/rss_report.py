@@ -0,0 +1,85 @@
+"""
+Per-worker memory with and without preload (Linux only; reads /proc/<pid>/smaps_rollup).
+
+    python -m server.rss_report --workers 4 --requests 400
+
+Starts gunicorn -c server/gunicorn_conf.py twice (PRELOAD_APP=0, then 1), sends some traffic so
+refcount churn has a chance to unshare pages, then reports RSS / PSS / USS (private) per worker.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def _rollup(pid: int) -> Dict[str, int]:
+    out = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, val = line.split(":", 1)
+        out[key] = int(val.split()[0])  # kB
+    return out
+
+def _children(pid: int) -> List[int]:
+    path = Path(f"/proc/{pid}/task/{pid}/children")
+    return [int(p) for p in path.read_text().split()] if path.exists() else []
+
+def _wait_ready(url: str, secs: float = 60):
+    deadline = time.time() + secs
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.3)
+    raise RuntimeError(f"server did not come up at {url}")
+
+def measure(preload: bool, workers: int, requests: int, port: int) -> Dict[str, float]:
+    env = {**os.environ, "PRELOAD_APP": "1" if preload else "0", "WEB_CONCURRENCY": str(workers),
+           "BIND": f"127.0.0.1:{port}", "STATE_DIR": "", "STATS_SNAPSHOT_PATH": ""}
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "server/gunicorn_conf.py"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        _wait_ready(base + "/api/health")
+        while len(_children(proc.pid)) < workers:
+            time.sleep(0.2)
+        time.sleep(1)
+        body = json.dumps({"mode": "offline"}).encode()
+        for _ in range(requests):
+            req = urllib.request.Request(base + "/api/round", data=body, headers={"Content-Type": "application/json"})
+            urllib.request.urlopen(req).read()
+        time.sleep(1)
+        stats = [_rollup(pid) for pid in _children(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    n = len(stats)
+    return {
+        "workers": n,
+        "rss_mb": sum(s["Rss"] for s in stats) / n / 1024,
+        "pss_mb": sum(s["Pss"] for s in stats) / n / 1024,
+        "uss_mb": sum(s["Private_Clean"] + s["Private_Dirty"] for s in stats) / n / 1024,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--port", type=int, default=8791)
+    args = ap.parse_args(argv)
+
+    print(f"{'mode':<10}{'workers':>8}{'RSS/worker':>13}{'PSS/worker':>13}{'USS/worker':>13}")
+    for preload in (False, True):
+        r = measure(preload, args.workers, args.requests, args.port)
+        print(f"{'preload' if preload else 'per-worker':<10}{r['workers']:>8}"
+              f"{r['rss_mb']:>10.1f} MB{r['pss_mb']:>10.1f} MB{r['uss_mb']:>10.1f} MB")
+
+if __name__ == "__main__":
+    main()
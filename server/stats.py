@@ -0,0 +1,257 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from math import floor
+from pathlib import Path
+from typing import Dict, Any, Optional
+from .persist import claim_writer_lock
+from .game_data import PLACES
+
+STATS_GRID_DEG = float(os.getenv("STATS_GRID_DEG", "5"))            # heatmap cell size in degrees
+STATS_SNAPSHOT_PATH = os.getenv("STATS_SNAPSHOT_PATH", str(Path(__file__).with_name("place_stats.json")))
+STATS_SNAPSHOT_SECS = int(os.getenv("STATS_SNAPSHOT_SECS", "60"))   # seconds between background disk snapshots
+
+_GRID_ROWS = max(int(180 / STATS_GRID_DEG), 1)
+_GRID_COLS = max(int(360 / STATS_GRID_DEG), 1)
+
+def place_id(city: str, country: str) -> str:
+    """URL-safe id for a place, e.g. ("São Paulo", "Brazil") -> "sao-paulo-brazil"."""
+    raw = f"{city or ''} {country or ''}"
+    ascii_ = unicodedata.normalize("NFKD", raw).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", ascii_.lower()).strip("-")
+
+# Only catalog places are aggregated: AI-invented cities are unbounded and may not slug uniquely.
+_CATALOG_IDS = frozenset(place_id(p.city, p.country) for p in PLACES)
+
+def catalog_id(city: str, country: str) -> Optional[str]:
+    """place_id() for catalog places, None for anything else (e.g. AI-invented cities)."""
+    pid = place_id(city, country)
+    return pid if pid in _CATALOG_IDS else None
+
+# =========================
+# Streaming quantile (P² algorithm, Jain & Chlamtac) — 5 markers, O(1) memory
+# =========================
+class P2Quantile:
+    def __init__(self, p: float):
+        self.p = p
+        self.q: list[float] = []             # marker heights (raw samples until 5 are seen)
+        self.n = [0, 1, 2, 3, 4]             # marker positions
+        self.np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # desired positions
+        self.dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float):
+        q = self.q
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x; k = 0
+        elif x >= q[4]:
+            q[4] = x; k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+
+        for i in range(k + 1, 5):
+            self.n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+
+        for i in (1, 2, 3):
+            d = self.np[i] - self.n[i]
+            if (d >= 1 and self.n[i + 1] - self.n[i] > 1) or (d <= -1 and self.n[i - 1] - self.n[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = self._parabolic(i, s)
+                if not (q[i - 1] < qp < q[i + 1]):
+                    qp = q[i] + s * (q[i + s] - q[i]) / (self.n[i + s] - self.n[i])
+                q[i] = qp
+                self.n[i] += s
+
+    def _parabolic(self, i: int, s: int) -> float:
+        q, n = self.q, self.n
+        return q[i] + s / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        if not self.q:
+            return None
+        if len(self.q) < 5:
+            idx = min(int(round(self.p * (len(self.q) - 1))), len(self.q) - 1)
+            return self.q[idx]
+        return self.q[2]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"p": self.p, "q": self.q, "n": self.n, "np": self.np}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "P2Quantile":
+        obj = cls(d["p"])
+        obj.q, obj.n, obj.np = list(d["q"]), list(d["n"]), list(d["np"])
+        return obj
+
+# =========================
+# Per-place aggregates
+# =========================
+class PlaceStats:
+    def __init__(self, city: str, country: str):
+        self.city = city
+        self.country = country
+        self.count = 0
+        self.mean_km = 0.0
+        self.mean_score = 0.0
+        self.median = P2Quantile(0.5)
+        self.p90 = P2Quantile(0.9)
+        self.cells: Dict[str, int] = {}   # "row:col" -> guesses in that grid cell
+
+    def add(self, guess_lat: float, guess_lon: float, distance_km: float, score: int):
+        self.count += 1
+        self.mean_km += (distance_km - self.mean_km) / self.count
+        self.mean_score += (score - self.mean_score) / self.count
+        self.median.add(distance_km)
+        self.p90.add(distance_km)
+        # lat=90 / lon=180 are valid guesses; clamp them into the last row/column instead of one past it
+        row = min(floor((guess_lat + 90) / STATS_GRID_DEG), _GRID_ROWS - 1)
+        col = min(floor((guess_lon + 180) / STATS_GRID_DEG), _GRID_COLS - 1)
+        cell = f"{row}:{col}"
+        self.cells[cell] = self.cells.get(cell, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        med, p90 = self.median.value(), self.p90.value()
+        return {
+            "city": self.city,
+            "country": self.country,
+            "guesses": self.count,
+            "meanKm": round(self.mean_km, 2),
+            "medianKm": round(med, 2) if med is not None else None,
+            "p90Km": round(p90, 2) if p90 is not None else None,
+            "meanScore": round(self.mean_score, 1),
+        }
+
+    def heatmap(self) -> Dict[str, Any]:
+        cells = []
+        for key, n in self.cells.items():
+            row, col = (int(v) for v in key.split(":"))
+            cells.append({
+                "lat": round(row * STATS_GRID_DEG - 90 + STATS_GRID_DEG / 2, 4),
+                "lon": round(col * STATS_GRID_DEG - 180 + STATS_GRID_DEG / 2, 4),
+                "count": n,
+            })
+        cells.sort(key=lambda c: -c["count"])
+        return {"cellDeg": STATS_GRID_DEG, "guesses": self.count, "cells": cells}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "city": self.city, "country": self.country, "count": self.count,
+            "mean_km": self.mean_km, "mean_score": self.mean_score,
+            "median": self.median.to_dict(), "p90": self.p90.to_dict(),
+            "cells": self.cells,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "PlaceStats":
+        obj = cls(d["city"], d["country"])
+        obj.count = d["count"]
+        obj.mean_km = d["mean_km"]
+        obj.mean_score = d["mean_score"]
+        obj.median = P2Quantile.from_dict(d["median"])
+        obj.p90 = P2Quantile.from_dict(d["p90"])
+        obj.cells = dict(d["cells"])
+        return obj
+
+class StatsStore:
+    """Incrementally updated guess aggregates per place, snapshotted to disk every STATS_SNAPSHOT_SECS by a background thread."""
+
+    def __init__(self, path: Optional[str] = STATS_SNAPSHOT_PATH, snapshot_secs: int = STATS_SNAPSHOT_SECS):
+        self.path = Path(path) if path else None
+        self.snapshot_secs = snapshot_secs
+        self._places: Dict[str, PlaceStats] = {}
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, place: dict, guess_lat: float, guess_lon: float, distance_km: float, score: int):
+        pid = catalog_id(place["city"], place["country"])
+        if pid is None:
+            return
+        with self._lock:
+            ps = self._places.get(pid)
+            if ps is None:
+                ps = self._places[pid] = PlaceStats(place["city"], place["country"])
+            ps.add(guess_lat, guess_lon, distance_km, score)
+            self._dirty = True
+
+    def summary(self, pid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            ps = self._places.get(pid)
+            return {"id": pid, **ps.summary()} if ps else None
+
+    def heatmap(self, pid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            ps = self._places.get(pid)
+            return {"id": pid, **ps.heatmap()} if ps else None
+
+    def snapshot(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps({pid: ps.to_dict() for pid, ps in self._places.items()}, ensure_ascii=False)
+            self._dirty = False
+        try:
+            with self._io_lock:
+                tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+                tmp.write_text(payload, encoding="utf-8")
+                os.replace(tmp, self.path)
+        except OSError as e:
+            with self._lock:
+                self._dirty = True  # retry on the next interval
+            print("⚠️ Failed to snapshot place stats:", e)
+
+    def load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            with self._lock:
+                self._places = {pid: PlaceStats.from_dict(d) for pid, d in data.items() if pid in _CATALOG_IDS}
+            print(f"📈 Restored guess stats for {len(self._places)} places")
+        except (OSError, ValueError, KeyError) as e:
+            print("⚠️ Failed to load place stats snapshot:", e)
+
+    # ---- background snapshots ----
+    def acquire(self) -> bool:
+        """Only one worker may own the snapshot file; the others keep in-memory stats only."""
+        if not self.path:
+            return True
+        if claim_writer_lock(self.path.with_name(self.path.name + ".lock")):
+            return True
+        self.path = None
+        return False
+
+    def start(self):
+        if not self.path:
+            return
+        def loop():
+            while not self._stop.wait(self.snapshot_secs):
+                try:
+                    self.snapshot()
+                except Exception as e:
+                    print("⚠️ Place stats snapshot failed:", e)
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="stats-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop and wait for the writer, so a snapshot in flight finishes before the final one."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
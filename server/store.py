@@ -1,14 +1,24 @@
-import time, uuid
+import threading, time, uuid
 from typing import Dict, Tuple, Optional
+from .persist import RoundJournal
 
 class RoundStore:
-    def __init__(self, ttl_seconds: int = 20 * 60):
+    def __init__(self, ttl_seconds: int = 20 * 60, journal: Optional[RoundJournal] = None):
         self.ttl = ttl_seconds
+        self.journal = journal
         self._items: Dict[str, Tuple[float, float, float, dict]] = {}
+        self._lock = threading.Lock()
 
     def new_round(self, lat: float, lon: float, meta: dict) -> str:
         rid = uuid.uuid4().hex
-        self._items[rid] = (lat, lon, time.time() + self.ttl, meta)
+        item = (lat, lon, time.time() + self.ttl, meta)
+        journal = self.journal
+        rec = journal.encode_new(rid, item) if journal else None  # encoded off the lock
+        with self._lock:
+            self._items[rid] = item
+        # appended after the insert: a snapshot in between already holds the round, and the record
+        # lands in the next delta log, where replaying it is harmless
+        if rec: journal.append(rec)
         return rid
 
     def get_answer(self, rid: str) -> Optional[Tuple[float, float, dict]]:
@@ -21,4 +31,20 @@ class RoundStore:
         return (lat, lon, meta)
 
     def pop(self, rid: str):
-        self._items.pop(rid, None)
+        journal = self.journal
+        with self._lock:
+            removed = self._items.pop(rid, None) is not None
+        if removed and journal: journal.append(journal.encode_delete(rid))
+
+    # ---- persistence (no-ops without a journal) ----
+    def snapshot(self, story_state: Optional[dict] = None) -> int:
+        if not self.journal: return 0
+        return self.journal.snapshot(self._items, self._lock, story_state)
+
+    def restore(self) -> int:
+        if not self.journal: return 0
+        items = self.journal.restore()
+        with self._lock:
+            items.update(self._items)
+            self._items = items
+        return len(items)
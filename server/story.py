@@ -1,16 +1,27 @@
+import contextvars
 import os
 import json
 import random
 import re
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait, FIRST_COMPLETED
 from typing import Dict, Any, Tuple, Optional
 from math import radians, sin, cos, sqrt, atan2, exp
 from pydantic import BaseModel, Field, ValidationError, field_validator
 from collections import deque
-from .game_data import PLACES, DEFAULT_CENTER, DEFAULT_ZOOM
+from .game_data import Place, PLACES, DEFAULT_CENTER, DEFAULT_ZOOM
+from .profiling import traced
+from .llm import LLMClient, OpenAIChatClient, FakeLLMClient, FaultRates
 
 RECENT_BLOCK = int(os.getenv("AI_RECENT_BLOCK", "10"))
 AI_MAX_ATTEMPTS = int(os.getenv("AI_MAX_ATTEMPTS", "4"))
+AI_MODEL = os.getenv("AI_MODEL", "gpt-4o-mini")
+AI_TIMEOUT_SECS = float(os.getenv("AI_TIMEOUT_SECS", "30"))         # per-call HTTP timeout (SDK default is 600s)
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "1"))              # SDK-level retries per call
+AI_CATALOG_ANCHOR = os.getenv("AI_CATALOG_ANCHOR", "0").strip().lower() in {"1", "true", "yes"}  # server picks city, LLM writes persona
+AI_PERSONA_CACHE = int(os.getenv("AI_PERSONA_CACHE", "3"))         # cached persona variants per place (anchored mode)
+AI_PERSONA_REUSE = float(os.getenv("AI_PERSONA_REUSE", "0"))       # chance to serve a cached persona instead of calling the LLM
 
 # Circuit breaker defaults
 CB_FAIL_LIMIT = int(os.getenv("AI_CB_FAIL_LIMIT", "3"))          # consecutive parse/generation fails before cooldown
@@ -24,23 +35,43 @@ _recent_regions = deque(maxlen=RECENT_BLOCK)
 
 AI_CITY_MODE = os.getenv("AI_CITY_MODE", "0").strip().lower() in {"1", "true", "yes"}
 OPENAI_KEY = os.getenv("OPENAI_API_KEY")
+AI_FAKE_LATENCY = os.getenv("AI_FAKE_LATENCY")  # e.g. "lognormal:6.5:0.6" → use in-process FakeLLMClient instead of OpenAI
+AI_FAKE_FAULTS = os.getenv("AI_FAKE_FAULTS", "")  # e.g. "rate_limit=0.05,malformed=0.1"
+
+# Hedged requests (off unless AI_HEDGE_AFTER_MS > 0)
+AI_HEDGE_AFTER_MS = int(os.getenv("AI_HEDGE_AFTER_MS", "0"))      # fire a 2nd call if the 1st hasn't validated by then
+AI_HEDGE_MODEL = os.getenv("AI_HEDGE_MODEL", AI_MODEL)
+AI_HEDGE_BASE_URL = os.getenv("AI_HEDGE_BASE_URL")                # OpenAI-compatible alternate provider
+AI_HEDGE_API_KEY = os.getenv("AI_HEDGE_API_KEY") or OPENAI_KEY
+AI_HEDGE_RATIO = float(os.getenv("AI_HEDGE_RATIO", "0.1"))       # hedges earned per primary call (spend budget)
+AI_HEDGE_BURST = float(os.getenv("AI_HEDGE_BURST", "5"))         # max banked hedges
+AI_HEDGE_POOL = int(os.getenv("AI_HEDGE_POOL", "16"))            # threads for hedgeable primaries + hedges; full pool => no hedge
+
+# Latency SLO routing for default-mode traffic (off unless AI_SLO_P95_MS > 0)
+AI_SLO_P95_MS = float(os.getenv("AI_SLO_P95_MS", "0"))           # target p95 of AI generation time
+AI_SLO_WINDOW = int(os.getenv("AI_SLO_WINDOW", "50"))            # recent AI generations kept for the p95
+AI_SLO_WINDOW_SECS = int(os.getenv("AI_SLO_WINDOW_SECS", "300")) # ...and only if younger than this
+AI_SLO_STEP = float(os.getenv("AI_SLO_STEP", "0.1"))             # offload share change per observation
+AI_SLO_PROBE = float(os.getenv("AI_SLO_PROBE", "0.05"))          # share always sent to AI so recovery is noticed
 
 # =========================
 # Circuit breaker state
 # =========================
 _AI_DISABLED_UNTIL: float = 0.0
 _AI_CONSEC_FAILS: int = 0
+breaker_events = deque(maxlen=100)  # (timestamp, seconds, reason) per trip, for diagnostics
 
 def _now() -> float:
     return time.time()
 
 def _ai_available() -> bool:
-    return bool(OPENAI_KEY) and _now() >= _AI_DISABLED_UNTIL
+    return (bool(OPENAI_KEY) or _llm_client_injected) and _now() >= _AI_DISABLED_UNTIL
 
 def _disable_ai(seconds: int, reason: str):
     global _AI_DISABLED_UNTIL, _AI_CONSEC_FAILS
     _AI_DISABLED_UNTIL = _now() + max(seconds, 1)
     _AI_CONSEC_FAILS = 0
+    breaker_events.append((_now(), seconds, reason))
     print(f"🔌 AI temporarily disabled for {seconds}s → {reason}")
 
 def _note_ai_soft_fail():
@@ -89,6 +120,16 @@ class AIPlace(BaseModel):
     def _strip(cls, v):
         return (v or "").strip()
 
+class AIPersona(BaseModel):
+    character: str
+    monologue: str
+    hints: Hints
+
+    @field_validator("monologue")
+    @classmethod
+    def _strip(cls, v):
+        return (v or "").strip()
+
 def _city_key(city: str, country: str) -> str:
     return f"{(city or '').strip().lower()}|{(country or '').strip().lower()}"
 
@@ -111,6 +152,7 @@ def score_from_km(distance_km: float) -> int:
 # =========================
 # Local (fallback) generator
 # =========================
+@traced("story.pick_from_local")
 def _pick_from_local() -> Dict[str, Any]:
     place = random.choice(PLACES)
     name_seeds = ["Ava","Kai","Mina","Leo","Zara","Niko","Ravi","Mei","Ilya","Sofi"]
@@ -162,35 +204,55 @@ def build_ai_prompt(avoid_cities: list[str], nudge_region: Optional[str]) -> str
         "- Output JSON ONLY."
     )
 
+def build_persona_prompt(place: Place) -> str:
+    return (
+        f"Geography game. Secret city: {place.city}, {place.country}. Local color: {', '.join(place.tidbits)}.\n"
+        "Return STRICT JSON only: {character, monologue, hints {cuisine, habits, vibes}}.\n"
+        "- monologue: 2 first-person sentences hinting at the city WITHOUT naming it or the country.\n"
+        "- hints: ≤ 5 items total."
+    )
+
 def _scrub_backticks(s: str) -> str:
     s = s.strip()
     if s.startswith("```"):
         s = re.sub(r"^```(?:json)?\s*|\s*```$", "", s, flags=re.IGNORECASE | re.DOTALL).strip()
     return s
 
+_PLACE_TOKENS = frozenset(t for p in PLACES for t in (p.city, p.country))  # built once (shared across forks)
+
+@traced("story.redact_leaks")
 def _redact_leaks(text: str, city: str, country: str) -> str:
     redacted = text
-    tokens = {city, country}
-    for p in PLACES:
-        tokens.add(p.city); tokens.add(p.country)
+    tokens = _PLACE_TOKENS | {city, country}
     for t in sorted({t for t in tokens if t and len(t) >= 3}, key=lambda x: -len(x)):
         redacted = re.sub(rf"\b{re.escape(t)}\b", "[redacted]", redacted, flags=re.IGNORECASE)
     return redacted
 
 # =========================
-# OpenAI client (lazy)
+# LLM client (lazy, pluggable)
 # =========================
-_openai_client = None
-def get_openai_client():
-    global _openai_client
-    if _openai_client is not None:
-        return _openai_client
+_llm_client: Optional[LLMClient] = None
+_llm_client_injected = False
+
+def set_llm_client(client: Optional[LLMClient]):
+    """Install a client (e.g. FakeLLMClient) in place of OpenAI; None restores the env-driven default."""
+    global _llm_client, _llm_client_injected
+    _llm_client = client
+    _llm_client_injected = client is not None
+
+if AI_FAKE_LATENCY:
+    set_llm_client(FakeLLMClient(AI_FAKE_LATENCY, FaultRates.parse(AI_FAKE_FAULTS)))
+    print(f"🧪 Using fake LLM client (latency={AI_FAKE_LATENCY}, faults={AI_FAKE_FAULTS or 'none'})")
+
+def get_llm_client() -> Optional[LLMClient]:
+    global _llm_client
+    if _llm_client is not None:
+        return _llm_client
     if not OPENAI_KEY:
         return None
     try:
-        from openai import OpenAI
-        _openai_client = OpenAI(api_key=OPENAI_KEY)
-        return _openai_client
+        _llm_client = OpenAIChatClient(api_key=OPENAI_KEY, timeout=AI_TIMEOUT_SECS, max_retries=AI_MAX_RETRIES)
+        return _llm_client
     except Exception as e:
         print("⚠️ Failed to init OpenAI client:", e)
         return None
@@ -206,11 +268,177 @@ def _is_rate_limit_error(e: Exception) -> bool:
     msg = str(e).lower()
     return ("rate limit" in msg) or ("429" in msg)
 
+class _DuplicateCity(ValueError):
+    def __init__(self, obj: "AIPlace"):
+        super().__init__(f"recent city {obj.city}, {obj.country}")
+        self.obj = obj
+
+def _validate_new_city(data: dict) -> AIPlace:
+    obj = AIPlace(**data)
+    if _city_key(obj.city, obj.country) in _recent_cities:
+        raise _DuplicateCity(obj)
+    return obj
+
+@traced("story.llm_call")
+def _generate_once(client: LLMClient, model: str, prompt: str, validate, max_tokens: int):
+    """One completion → scrubbed, parsed, then validate(data). Raises on bad JSON / validation / recent city."""
+    raw = client.complete(
+        prompt,
+        model=model,
+        temperature=1.1,
+        max_tokens=max_tokens,
+        presence_penalty=0.2,
+    )
+    raw = _scrub_backticks(raw)
+    return validate(json.loads(raw))
+
+def _trip_breaker_for(e: Exception) -> bool:
+    """Disable AI for quota/auth or rate-limit errors. Returns True if the breaker was tripped."""
+    if _is_quota_or_auth_error(e):
+        _disable_ai(CB_QUOTA_SECS, "quota/auth error from OpenAI")
+        return True
+    if _is_rate_limit_error(e):
+        _disable_ai(CB_RATELIMIT_SECS, "rate limit")
+        return True
+    return False
+
+# =========================
+# Hedged requests
+# =========================
+class _HedgeBudget:
+    """Token bucket: each primary call earns AI_HEDGE_RATIO, each hedge spends 1 (caps extra spend at ~ratio)."""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def has_token(self) -> bool:
+        return self.tokens >= 1
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def refund(self):
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+_hedge_budget = _HedgeBudget(AI_HEDGE_RATIO, AI_HEDGE_BURST)
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_hedge_slots = threading.BoundedSemaphore(AI_HEDGE_POOL)
+_hedge_client: Optional[LLMClient] = None
+
+def _try_submit(fn, *args) -> Optional[Future]:
+    """Run fn on the hedge pool only if a thread is free right now; never queue (queue wait would look like latency)."""
+    global _hedge_pool
+    if not _hedge_slots.acquire(blocking=False):
+        return None
+    if _hedge_pool is None:
+        _hedge_pool = ThreadPoolExecutor(max_workers=AI_HEDGE_POOL, thread_name_prefix="ai-hedge")
+    f = _hedge_pool.submit(contextvars.copy_context().run, fn, *args)  # keeps the request trace for spans
+    f.add_done_callback(lambda _: _hedge_slots.release())
+    return f
+
+def _get_hedge_client(primary: LLMClient) -> LLMClient:
+    global _hedge_client
+    if _llm_client_injected or not AI_HEDGE_BASE_URL:
+        return primary
+    if _hedge_client is None:
+        try:
+            _hedge_client = OpenAIChatClient(api_key=AI_HEDGE_API_KEY, base_url=AI_HEDGE_BASE_URL,
+                                             timeout=AI_TIMEOUT_SECS, max_retries=AI_MAX_RETRIES)
+        except Exception as e:
+            print("⚠️ Failed to init hedge client:", e)
+            return primary
+    return _hedge_client
+
+_HEDGE_DISABLED_UNTIL: float = 0.0  # hedge-side cooldown; never touches the primary breaker
+
+def _hedge_available() -> bool:
+    return _now() >= _HEDGE_DISABLED_UNTIL
+
+def _note_hedge_error(e: BaseException):
+    """A bad key or 429 at the hedge provider pauses hedging only; the primary stays up."""
+    global _HEDGE_DISABLED_UNTIL
+    if _is_quota_or_auth_error(e):
+        secs, reason = CB_QUOTA_SECS, "quota/auth error"
+    elif _is_rate_limit_error(e):
+        secs, reason = CB_RATELIMIT_SECS, "rate limit"
+    else:
+        return
+    _HEDGE_DISABLED_UNTIL = _now() + max(secs, 1)
+    print(f"🪁 Hedging paused for {secs}s → {reason} from hedge provider")
+
+def _note_loser_error(f):
+    # An in-flight sync HTTP call can't be aborted; its result is dropped, but its errors still feed the breaker.
+    if f.exception() is not None:
+        _trip_breaker_for(f.exception())
+
+def _note_hedge_loser_error(f):
+    if f.exception() is not None:
+        _note_hedge_error(f.exception())
+
+def _generate_hedged(client: LLMClient, prompt: str, validate=_validate_new_city, max_tokens: int = 240):
+    """Validated completion (hedged when enabled). Only successes feed the SLO router's latency window."""
+    t0 = time.perf_counter()
+    obj = _generate_with_hedge(client, prompt, validate, max_tokens)
+    if AI_SLO_P95_MS > 0:
+        _router.observe((time.perf_counter() - t0) * 1000)
+    return obj
+
+def _generate_with_hedge(client: LLMClient, prompt: str, validate, max_tokens: int):
+    if AI_HEDGE_AFTER_MS <= 0:
+        return _generate_once(client, AI_MODEL, prompt, validate, max_tokens)
+
+    _hedge_budget.earn()
+    # A blocking SDK call can't be abandoned from its own thread, so only a primary that may actually be
+    # hedged runs on the pool; without a banked hedge (or a free pool thread) it runs on the caller's thread.
+    primary = None
+    if _hedge_budget.has_token():
+        primary = _try_submit(_generate_once, client, AI_MODEL, prompt, validate, max_tokens)
+    if primary is None:
+        return _generate_once(client, AI_MODEL, prompt, validate, max_tokens)
+    try:
+        return primary.result(timeout=AI_HEDGE_AFTER_MS / 1000)
+    except FuturesTimeout:
+        pass
+
+    if not (_ai_available() and _hedge_available() and _hedge_budget.try_spend()):
+        return primary.result()
+    hedge = _try_submit(_generate_once, _get_hedge_client(client), AI_HEDGE_MODEL, prompt, validate, max_tokens)
+    if hedge is None:
+        _hedge_budget.refund()
+        return primary.result()
+
+    print(f"🪁 AI call slower than {AI_HEDGE_AFTER_MS}ms → hedging with {AI_HEDGE_MODEL}")
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            if f.exception() is None:
+                for loser in pending:
+                    loser.add_done_callback(_note_loser_error if loser is primary else _note_hedge_loser_error)
+                return f.result()
+            if f is hedge:
+                _note_hedge_error(f.exception())
+    # both failed: only the primary's error reaches the caller (and so the breaker)
+    raise primary.exception()
+
+@traced("story.pick_from_ai")
 def _pick_from_ai() -> Optional[Dict[str, Any]]:
     if not _ai_available():
         return None
 
-    client = get_openai_client()
+    client = get_llm_client()
     if not client:
         return None
 
@@ -220,26 +448,8 @@ def _pick_from_ai() -> Optional[Dict[str, Any]]:
 
     for attempt in range(AI_MAX_ATTEMPTS):
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=1.1,
-                max_tokens=240,
-                presence_penalty=0.2,
-            )
-            raw = (resp.choices[0].message.content or "").strip()
-            raw = _scrub_backticks(raw)
-
-            data = json.loads(raw)
-            obj = AIPlace(**data)  # validate
-
+            obj = _generate_hedged(client, prompt)
             key = _city_key(obj.city, obj.country)
-            if key in _recent_cities:
-                print(f"↩️ AI returned recent city again ({obj.city}, {obj.country}); retry {attempt+1}/{AI_MAX_ATTEMPTS}")
-                prompt += f"\n- IMPORTANT: Do not choose {obj.city}, {obj.country}."
-                _note_ai_soft_fail()
-                continue
-
             _recent_cities.append(key)
             _recent_regions.append(_region_key(obj.region))
             _reset_ai_fail_counter()
@@ -260,57 +470,237 @@ def _pick_from_ai() -> Optional[Dict[str, Any]]:
                 "fallbackReason": None,
             }
 
+        except _DuplicateCity as dup:
+            obj = dup.obj
+            print(f"↩️ AI returned recent city again ({obj.city}, {obj.country}); retry {attempt+1}/{AI_MAX_ATTEMPTS}")
+            prompt += f"\n- IMPORTANT: Do not choose {obj.city}, {obj.country}."
+            _note_ai_soft_fail()
         except (json.JSONDecodeError, ValidationError) as ve:
             print("⚠️ AI JSON issue:", ve)
             _note_ai_soft_fail()
         except Exception as e:
             print("⚠️ AI generation failed:", e)
             # classify and disable for a while
-            if _is_quota_or_auth_error(e):
-                _disable_ai(CB_QUOTA_SECS, "quota/auth error from OpenAI")
-                break
-            elif _is_rate_limit_error(e):
-                _disable_ai(CB_RATELIMIT_SECS, "rate limit")
+            if _trip_breaker_for(e):
                 break
-            else:
-                # minor backoff per attempt to avoid hammering
-                time.sleep(min(2 + attempt, 6))
+            # minor backoff per attempt to avoid hammering
+            time.sleep(min(2 + attempt, 6))
 
     # run out of attempts → soft disable if not already disabled
     if _ai_available():
         _disable_ai(CB_COOLDOWN_SECS, f"exhausted attempts ({AI_MAX_ATTEMPTS})")
     return None
 
+# =========================
+# Catalog-anchored AI picker (server picks the city, LLM only writes the persona)
+# =========================
+_persona_cache: Dict[str, deque] = {}  # city key -> recent persona variants
+
+def _choose_catalog_place(candidates: list = PLACES) -> Place:
+    fresh = [p for p in candidates if _city_key(p.city, p.country) not in _recent_cities]
+    last_region = _recent_regions[-1] if _recent_regions else None
+    other_region = [p for p in fresh if _region_key(p.region) != last_region]
+    return random.choice(other_region or fresh or candidates)
+
+def _anchored_bundle(place: Place, persona: Dict[str, Any]) -> Dict[str, Any]:
+    # only a round that is actually served counts towards the recent-city block and region nudge
+    _recent_cities.append(_city_key(place.city, place.country))
+    _recent_regions.append(_region_key(place.region))
+    return {
+        "place": {
+            "city": place.city, "country": place.country,
+            "lat": place.lat, "lon": place.lon, "region": place.region
+        },
+        **persona,
+        "mapDefault": {"center": DEFAULT_CENTER, "zoom": DEFAULT_ZOOM},
+        "ai": True,
+        "modeUsed": "ai_anchored",
+        "fallbackReason": None,
+    }
+
+@traced("story.pick_from_ai_anchored")
+def _pick_from_ai_anchored() -> Optional[Dict[str, Any]]:
+    client = get_llm_client() if _ai_available() else None
+    if not client:
+        # breaker open (or no client): a previously generated persona still beats the offline template
+        cached_places = [p for p in PLACES if _persona_cache.get(_city_key(p.city, p.country))]
+        if not cached_places:
+            return None
+        place = _choose_catalog_place(cached_places)
+        print("♻️ AI unavailable → serving a cached persona (anchored mode)")
+        return _anchored_bundle(place, random.choice(_persona_cache[_city_key(place.city, place.country)]))
+
+    place = _choose_catalog_place()
+    key = _city_key(place.city, place.country)
+
+    cached = _persona_cache.get(key)
+    if cached and len(cached) >= AI_PERSONA_CACHE and random.random() < AI_PERSONA_REUSE:
+        return _anchored_bundle(place, random.choice(cached))
+
+    prompt = build_persona_prompt(place)
+    for attempt in range(AI_MAX_ATTEMPTS):
+        try:
+            obj = _generate_hedged(client, prompt, validate=lambda d: AIPersona(**d), max_tokens=160)
+            _reset_ai_fail_counter()
+            persona = {
+                "character": obj.character,
+                "monologue": _redact_leaks(obj.monologue, place.city, place.country),
+                "hints": obj.hints.model_dump(),
+            }
+            _persona_cache.setdefault(key, deque(maxlen=max(AI_PERSONA_CACHE, 1))).append(persona)
+            print("✨ Using AI-anchored mode (persona for catalog city)")
+            return _anchored_bundle(place, persona)
+
+        except (json.JSONDecodeError, ValidationError) as ve:
+            print("⚠️ AI JSON issue:", ve)
+            _note_ai_soft_fail()
+        except Exception as e:
+            print("⚠️ AI generation failed:", e)
+            if _trip_breaker_for(e):
+                break
+            time.sleep(min(2 + attempt, 6))
+
+    if _ai_available():
+        _disable_ai(CB_COOLDOWN_SECS, f"exhausted attempts ({AI_MAX_ATTEMPTS})")
+    if cached:
+        return _anchored_bundle(place, random.choice(cached))
+    return None
+
+# =========================
+# State export (survives restarts via persist.RoundJournal)
+# =========================
+def export_state() -> Dict[str, Any]:
+    return {
+        "recentCities": list(_recent_cities),
+        "recentRegions": list(_recent_regions),
+        "aiDisabledUntil": _AI_DISABLED_UNTIL,
+        "aiConsecFails": _AI_CONSEC_FAILS,
+    }
+
+def restore_state(state: Dict[str, Any]):
+    global _AI_DISABLED_UNTIL, _AI_CONSEC_FAILS
+    _recent_cities.extend(state.get("recentCities", []))
+    _recent_regions.extend(state.get("recentRegions", []))
+    _AI_DISABLED_UNTIL = max(_AI_DISABLED_UNTIL, float(state.get("aiDisabledUntil", 0.0)))
+    _AI_CONSEC_FAILS = int(state.get("aiConsecFails", 0))
+
+# =========================
+# Latency-SLO router (default mode only)
+# =========================
+class _LatencyRouter:
+    """
+    Rolling p95 of AI generation time. While it exceeds AI_SLO_P95_MS, each new observation shifts
+    AI_SLO_STEP more default traffic to the local generator (keeping AI_SLO_PROBE on AI as probes);
+    once it's back under, the share ramps down the same way.
+    """
+
+    def __init__(self):
+        self.samples: deque = deque(maxlen=max(AI_SLO_WINDOW, 1))  # (timestamp, ms)
+        self.offload = 0.0
+        self._lock = threading.Lock()
+
+    def _p95(self) -> Optional[float]:
+        cutoff = _now() - AI_SLO_WINDOW_SECS
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        if not self.samples:
+            return None
+        ms = sorted(v for _, v in self.samples)
+        return ms[min(int(0.95 * len(ms)), len(ms) - 1)]
+
+    def observe(self, elapsed_ms: float):
+        with self._lock:
+            self.samples.append((_now(), elapsed_ms))
+            p95 = self._p95()
+            if p95 is not None and p95 > AI_SLO_P95_MS:
+                self.offload = min(1.0 - AI_SLO_PROBE, self.offload + AI_SLO_STEP)
+            else:
+                self.offload = max(0.0, self.offload - AI_SLO_STEP)
+
+    def choose_ai(self) -> bool:
+        with self._lock:
+            if self.offload > 0 and self._p95() is None:
+                self.offload = 0.0  # window aged out with no probes: nothing says we're still slow
+            return random.random() >= self.offload
+
+    def report(self, decision: str) -> Dict[str, Any]:
+        with self._lock:
+            p95 = self._p95()
+            return {
+                "decision": decision,
+                "p95Ms": round(p95, 1) if p95 is not None else None,
+                "sloMs": AI_SLO_P95_MS or None,
+                "offloadShare": round(self.offload, 3),
+            }
+
+_router = _LatencyRouter()
+
 # =========================
 # Public API
 # =========================
+@traced("story.pick_place")
 def pick_place(force_mode: Optional[str] = None) -> Dict[str, Any]: 
     """
     force_mode:
       - "offline" => always use local list
       - "ai"      => try AI (falls back to local on failure, and may disable AI for a cooldown)
+      - "ai_anchored" => AI persona for a catalog city, regardless of AI_CATALOG_ANCHOR
       - None      => env default (AI_CITY_MODE + OPENAI_KEY with breaker)
+    AI_CATALOG_ANCHOR=1 makes the "ai" and default paths use the anchored picker.
+    Every bundle carries "route" (decision, rolling AI p95, offload share) and "fallbackReason".
     """
     mode = (force_mode or "").strip().lower()
     if mode == "offline":
-        return _pick_from_local()
+        offline = _pick_from_local()
+        offline["route"] = _router.report("offline_forced")
+        return offline
 
-    if mode == "ai":
-        bundle = _pick_from_ai()
+    ai_picker = _pick_from_ai_anchored if (mode == "ai_anchored" or AI_CATALOG_ANCHOR) else _pick_from_ai
+    if mode in {"ai", "ai_anchored"}:
+        if _ai_available():
+            bundle = ai_picker()
+        else:  # breaker open: the anchored picker can still serve a cached persona without calling the LLM
+            bundle = ai_picker() if ai_picker is _pick_from_ai_anchored else None
         if bundle:
+            bundle["route"] = _router.report("ai_forced")
             return bundle
         print("⚠️ Forced AI mode unavailable → falling back to local list")
         offline = _pick_from_local()
         offline["fallbackReason"] = "ai_unavailable"
+        offline["route"] = _router.report("offline_fallback")
         return offline
 
     # env-driven default path
-    if AI_CITY_MODE and _ai_available():
-        bundle = _pick_from_ai()
+    if not AI_CITY_MODE:
+        offline = _pick_from_local()
+        offline["route"] = _router.report("offline")
+        return offline
+
+    if not _ai_available():
+        bundle = ai_picker() if ai_picker is _pick_from_ai_anchored else None
         if bundle:
+            bundle["route"] = _router.report("ai_cached")
             return bundle
-        print("⚠️ AI mode failed/unavailable → falling back to local list")
-    return _pick_from_local()
+        offline = _pick_from_local()
+        offline["fallbackReason"] = "ai_unavailable"
+        offline["route"] = _router.report("offline_breaker")
+        return offline
+
+    if AI_SLO_P95_MS > 0 and not _router.choose_ai():
+        offline = _pick_from_local()
+        offline["fallbackReason"] = "slo_latency"
+        offline["route"] = _router.report("offline_slo")
+        return offline
+
+    bundle = ai_picker()
+    if bundle:
+        bundle["route"] = _router.report("ai")
+        return bundle
+    print("⚠️ AI mode failed/unavailable → falling back to local list")
+    offline = _pick_from_local()
+    offline["fallbackReason"] = "ai_failed"
+    offline["route"] = _router.report("offline_fallback")
+    return offline
 
 def evaluate_guess(secret: Tuple[float, float], guess: Tuple[float, float]):
     dist_km = haversine_km(secret[0], secret[1], guess[0], guess[1])